@@ -14,16 +14,22 @@ Examples:
       -i http://localhost:8000 -u user -p password -d packages_download_dir
     $ pypiupload requirements requirements.txt \
       -i http://localhost:8000 --no-use-wheel
+    $ pypiupload files packages/*.tar.gz -i internal -j 4
+    $ pypiupload files packages/*.tar.gz -i internal --batch
 
 """
 
 import argparse
+import functools
+import os
 import sys
 
 import pypiuploader
-from pypiuploader import download
 from pypiuploader import exceptions
-from pypiuploader import upload
+
+
+#: Default number of packages uploaded in parallel.
+DEFAULT_JOBS = min(8, (os.cpu_count() or 1) * 4)
 
 
 def main(argv=None, stdout=None):
@@ -65,6 +71,11 @@ class Command(object):
     **password** (``-p`` or ``--password``) are not given, will try to find
     them in the rc file.
 
+    **jobs** option (``-j`` or ``--jobs``) sets how many packages are uploaded
+    in parallel, defaults to :data:`DEFAULT_JOBS`.
+    With **batch** option (``--batch``), all the packages are uploaded in
+    a single request instead, see :meth:`.upload.PackageUploader.upload_many`.
+
     :param options:
         Command arguments, :class:`argparse.Namespace` instance parsed by
         the :func:`parse_args`.
@@ -84,16 +95,26 @@ class Command(object):
           file exists, parse it using :class:`.pypirc.RCParser`
         * Define the files to upload -- download them if necessary, using
           :class:`.download.PackageDownloader`
-        * Upload the packages
+        * Upload the packages, **jobs** of them at a time or all at once in
+          **batch** mode
 
         """
         uploader = self._make_uploader()
         filenames = self._get_filenames()
-        self._upload_files(uploader, filenames)
+        if getattr(self.options, 'batch', False):
+            self._upload_batch(uploader, filenames)
+        else:
+            self._upload_files(uploader, filenames)
 
     def _make_uploader(self):
+        # Heavy imports are deferred until needed, so that --help, --version
+        # and argument errors don't pay for them.
+        from pypiuploader import upload
         uploader = upload.PackageUploader.from_rc_file(
-            self.options.index, self.options.username, self.options.password)
+            self.options.index,
+            self.options.username,
+            self.options.password,
+            pool_size=getattr(self.options, 'jobs', DEFAULT_JOBS))
         return uploader
 
     def _get_filenames(self):
@@ -104,6 +125,7 @@ class Command(object):
         return filenames
 
     def _download(self):
+        from pypiuploader import download
         downloader = download.PackageDownloader(self.options.download_dir)
         filenames = downloader.download(
             requirements=getattr(self.options, 'packages', None),
@@ -112,88 +134,215 @@ class Command(object):
         return filenames
 
     def _upload_files(self, uploader, filenames):
+        from concurrent import futures
         self._print('Uploading packages to {0}\n'.format(uploader.host))
-        for filename in filenames:
-            self._upload_file(uploader, filename)
-
-    def _upload_file(self, uploader, filename):
-        self._print('Uploading {0}... '.format(filename))
+        jobs = getattr(self.options, 'jobs', DEFAULT_JOBS)
+        executor = futures.ThreadPoolExecutor(max_workers=jobs)
+        with executor:
+            uploads = [
+                (filename, executor.submit(uploader.upload, filename))
+                for filename in filenames
+            ]
+            try:
+                # Report in submission order to keep the output stable.
+                for filename, future in uploads:
+                    self._wait_for_upload(filename, future)
+            finally:
+                for __, future in uploads:
+                    future.cancel()
+
+    def _upload_batch(self, uploader, filenames):
+        filenames = list(filenames)
+        self._print('Uploading packages to {0}\n'.format(uploader.host))
+        if not filenames:
+            # A request without any ``content`` field would be invalid.
+            return
+        status = 'failed.\n'
         try:
-            uploader.upload(filename)
+            uploader.upload_many(filenames)
+            status = 'success.\n'
         except exceptions.PackageConflictError:
-            self._print('already uploaded.\n')
-        else:
-            self._print('success.\n')
-
-    def _print(self, message):
-        self.stdout.write(message)
-
+            status = 'already uploaded.\n'
+        finally:
+            message = 'Uploading {0} packages... '.format(len(filenames))
+            self._print(message, status)
 
-def parse_args(argv):
+    def _wait_for_upload(self, filename, future):
+        status = 'failed.\n'
+        try:
+            future.result()
+            status = 'success.\n'
+        except exceptions.PackageConflictError:
+            status = 'already uploaded.\n'
+        finally:
+            # Write the whole line at once, when the upload is done.
+            self._print('Uploading {0}... '.format(filename), status)
+
+    def _print(self, *messages):
+        self.stdout.writelines(messages)
+
+
+#: Positional argument destinations of the commands.
+_POSITIONALS = {
+    'files': 'files',
+    'packages': 'packages',
+    'requirements': 'requirements_file',
+}
+
+#: Destinations of the options taking a value, by option string.
+_COMMON_OPTIONS = {
+    '-i': 'index',
+    '--index-url': 'index',
+    '-u': 'username',
+    '--username': 'username',
+    '-p': 'password',
+    '--password': 'password',
+    '-j': 'jobs',
+    '--jobs': 'jobs',
+}
+_DOWNLOAD_OPTIONS = dict(_COMMON_OPTIONS, **{
+    '-d': 'download_dir',
+    '--download-dir': 'download_dir',
+})
+
+#: Destinations of the flag options, by option string.
+_COMMON_FLAGS = {
+    '--batch': 'batch',
+}
+_DOWNLOAD_FLAGS = dict(_COMMON_FLAGS, **{
+    '--no-use-wheel': 'no_use_wheel',
+})
+
+
+#: Help messages of the commands.
+_COMMAND_HELP = {
+    'files': 'Upload source distributions (tarball, zip file, wheel, etc.)',
+    'packages': 'Download and upload packages by their names',
+    'requirements': 'Download and upload packages from requirements file',
+}
+
+
+def parse_args(argv=None):
     """Parse arguments for the commands.
 
+    Plain command lines are parsed with a simple scan of the arguments
+    and an empty one is reported without parsing it at all.  Anything
+    else -- help, version, errors, abbreviated options -- is handed to
+    :mod:`argparse`, which is much slower to set up.  When the command is
+    known, only its own parser is built, unless there are unrecognized
+    arguments for the full parser to report.
+
     Return a :class:`argparse.Namespace` instance.
 
     :param argv:
-        A list of arguments to parse.
+        Optional list of arguments to parse, defaults to ``sys.argv[1:]``.
 
     """
-    description = (
-        'Upload source distributions of your requirements to your PyPI server.'
-    )
-    parser = argparse.ArgumentParser(description=description)
+    if argv is None:
+        argv = sys.argv[1:]
+    if not argv:
+        _exit_without_command(_make_parser())
+    options = _scan_args(argv)
+    if options is None and argv[0] in _POSITIONALS:
+        parser = _make_command_parser(argv[0])
+        options, extras = parser.parse_known_args(argv[1:])
+        if extras:
+            # Let the full parser report them, with its usage and prog.
+            options = None
+    if options is None:
+        parser = _make_parser()
+        options = parser.parse_args(argv)
+        if not options.command:  # pragma: no cover
+            # Bug in Python 3: http://bugs.python.org/issue16308
+            _exit_without_command(parser)
+    return options
 
-    subparsers = parser.add_subparsers(dest='command')
-    files_parser = subparsers.add_parser(
-        'files',
-        help='Upload source distributions (tarball, zip file, wheel, etc.)'
-    )
-    files_parser.add_argument(
-        'files',
-        metavar='FILE',
-        nargs=argparse.ONE_OR_MORE,
-        help='Source distribution file path'
-    )
-    _add_common_arguments(files_parser)
 
-    dir_args, dir_kwargs = ('-d', '--download-dir'), {
-        'dest': 'download_dir',
-        'default': None,
-        'help': 'Path to directory where the packages should be downloaded',
-    }
-    no_use_wheel_kwargs = {
-        'action': 'store_true',
-        'dest': 'no_use_wheel',
-        'default': False,
-        'help': 'Do not find and prefer wheel archives',
+def _exit_without_command(parser):
+    """Print the usage and a missing command error, exit with status 2."""
+    from gettext import gettext as _
+    parser.error(_('too few arguments'))
+
+
+def _scan_args(argv):
+    """Parse a plain command line the way the :mod:`argparse` parser would.
+
+    Return ``None`` if the arguments aren't plain: options in other forms
+    than ``-o value``, positional arguments split by options, invalid
+    values or missing index URL.
+
+    """
+    if not argv or argv[0] not in _POSITIONALS:
+        return None
+    command = argv[0]
+    options = {
+        'command': command,
+        'index': None,
+        'username': None,
+        'password': None,
+        'jobs': DEFAULT_JOBS,
     }
+    if command == 'files':
+        value_options, flags = _COMMON_OPTIONS, _COMMON_FLAGS
+    else:
+        value_options, flags = _DOWNLOAD_OPTIONS, _DOWNLOAD_FLAGS
+        options['download_dir'] = None
+    for dest in flags.values():
+        options[dest] = False
+
+    positionals = []
+    positionals_ended = False
+    args = iter(argv[1:])
+    for arg in args:
+        if not arg.startswith('-'):
+            if positionals_ended:
+                return None
+            positionals.append(arg)
+            continue
+        positionals_ended = bool(positionals)
+        if arg in flags:
+            options[flags[arg]] = True
+            continue
+        value = next(args, '-')
+        if arg not in value_options or value.startswith('-'):
+            return None
+        options[value_options[arg]] = value
+
+    if command == 'requirements':
+        if len(positionals) != 1:
+            return None
+        positionals = positionals[0]
+    elif not positionals:
+        return None
+    options[_POSITIONALS[command]] = positionals
+    if options['index'] is None:
+        return None
+    try:
+        options['jobs'] = _positive_int(options['jobs'])
+    except argparse.ArgumentTypeError:
+        return None
+    return argparse.Namespace(**options)
+
+
+@functools.lru_cache(maxsize=None)
+def _make_parser():
+    """Make the parser for all the commands.
+
+    It is built once, on first use, and reused by the following calls.
 
-    packages_parser = subparsers.add_parser(
-        'packages',
-        help='Download and upload packages by their names'
-    )
-    packages_parser.add_argument(
-        'packages',
-        metavar='PACKAGE',
-        nargs=argparse.ONE_OR_MORE,
-        help='Package name'
+    """
+    description = (
+        'Upload source distributions of your requirements to your PyPI server.'
     )
-    packages_parser.add_argument(*dir_args, **dir_kwargs)
-    packages_parser.add_argument('--no-use-wheel', **no_use_wheel_kwargs)
-    _add_common_arguments(packages_parser)
+    parser = argparse.ArgumentParser(description=description)
 
-    requirements_parser = subparsers.add_parser(
-        'requirements',
-        help='Download and upload packages from requirements file'
-    )
-    requirements_parser.add_argument(
-        'requirements_file',
-        metavar='REQUIREMENTS_FILE',
-        help='Path to requirements file'
-    )
-    requirements_parser.add_argument(*dir_args, **dir_kwargs)
-    requirements_parser.add_argument('--no-use-wheel', **no_use_wheel_kwargs)
-    _add_common_arguments(requirements_parser)
+    subparsers = parser.add_subparsers(dest='command')
+    for command in ('files', 'packages', 'requirements'):
+        subparser = subparsers.add_parser(
+            command,
+            help=_COMMAND_HELP[command]
+        )
+        _add_command_arguments(subparser, command)
 
     parser.add_argument(
         '-v',
@@ -201,13 +350,62 @@ def parse_args(argv):
         action='version',
         version=pypiuploader.__version__
     )
+    return parser
 
-    options = parser.parse_args(argv)
-    if not options.command:  # pragma: no cover
-        # Bug in Python 3: http://bugs.python.org/issue16308
-        from gettext import gettext as _
-        parser.error(_('too few arguments'))
-    return options
+
+@functools.lru_cache(maxsize=None)
+def _make_command_parser(command):
+    """Make a standalone parser for the given command's arguments.
+
+    It parses and reports errors like the **command** subparser of
+    :func:`_make_parser`, without building the others.  Each command's
+    parser is built once and reused.
+
+    """
+    prog = '{0} {1}'.format(os.path.basename(sys.argv[0]), command)
+    parser = argparse.ArgumentParser(prog=prog)
+    parser.set_defaults(command=command)
+    _add_command_arguments(parser, command)
+    return parser
+
+
+def _add_command_arguments(parser, command):
+    if command == 'files':
+        parser.add_argument(
+            'files',
+            metavar='FILE',
+            nargs=argparse.ONE_OR_MORE,
+            help='Source distribution file path'
+        )
+    elif command == 'packages':
+        parser.add_argument(
+            'packages',
+            metavar='PACKAGE',
+            nargs=argparse.ONE_OR_MORE,
+            help='Package name'
+        )
+    else:
+        parser.add_argument(
+            'requirements_file',
+            metavar='REQUIREMENTS_FILE',
+            help='Path to requirements file'
+        )
+    if command != 'files':
+        parser.add_argument(
+            '-d',
+            '--download-dir',
+            dest='download_dir',
+            default=None,
+            help='Path to directory where the packages should be downloaded'
+        )
+        parser.add_argument(
+            '--no-use-wheel',
+            action='store_true',
+            dest='no_use_wheel',
+            default=False,
+            help='Do not find and prefer wheel archives'
+        )
+    _add_common_arguments(parser)
 
 
 def _add_common_arguments(subparser):
@@ -232,6 +430,34 @@ def _add_common_arguments(subparser):
         default=None,
         help='Password'
     )
+    subparser.add_argument(
+        '-j',
+        '--jobs',
+        dest='jobs',
+        type=_positive_int,
+        default=DEFAULT_JOBS,
+        help='Number of packages to upload in parallel (default: {0})'.format(
+            DEFAULT_JOBS),
+    )
+    subparser.add_argument(
+        '--batch',
+        action='store_true',
+        dest='batch',
+        default=False,
+        help='Upload all packages in a single request, '
+             'if the server supports it'
+    )
+
+
+def _positive_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        error = '{0!r} is not a positive integer'.format(value)
+        raise argparse.ArgumentTypeError(error)
+    return number
 
 
 if __name__ == '__main__':
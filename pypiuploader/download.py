@@ -1,16 +1,16 @@
 """Downloading packages to a directory."""
 
 import os
+import subprocess
+import sys
 import tempfile
 
-from pip._internal import main
-
 
 class PackageDownloader(object):
 
     """Downloads source distributions from PyPI to a directory.
 
-    Runs ``pip download`` command, e.g.::
+    Runs ``pip download`` command in a subprocess, e.g.::
 
         >>> downloader = PackageDownloader('~/.packages')
         >>> downloader.download(['mock', 'requests==1.2.1'])
@@ -19,7 +19,7 @@ class PackageDownloader(object):
 
     .. code-block:: bash
 
-        $ pip download -d ~/.packages mock requests==1.2.1
+        $ python -m pip download -d ~/.packages mock requests==1.2.1
 
     And this:
 
@@ -30,7 +30,7 @@ class PackageDownloader(object):
 
     .. code-block:: bash
 
-        $ pip download -d ~/.packages -r requirements.txt
+        $ python -m pip download -d ~/.packages -r requirements.txt
 
     :param download_path:
         Optional path to directory where the packages should be downloaded,
@@ -54,7 +54,8 @@ class PackageDownloader(object):
         """Download the packages using ``pip download`` command.
 
         Either ``requirements`` or ``requirements_file`` must be given,
-        otherwise raise :exc:`ValueError`.
+        otherwise raise :exc:`ValueError`.  If pip fails, raise
+        :exc:`subprocess.CalledProcessError`.
 
         Return a generator yielding full paths to the downloaded packages.
 
@@ -69,7 +70,7 @@ class PackageDownloader(object):
         """
         self._make_download_dir()
         args = self._build_args(requirements, requirements_file, no_use_wheel)
-        main(args)
+        subprocess.check_call([sys.executable, '-m', 'pip'] + args)
         return self._list_download_dir()
 
     def _build_args(
@@ -103,7 +104,9 @@ class PackageDownloader(object):
                 pass
 
     def _list_download_dir(self):
-        for filename in os.listdir(self.download_path):
-            fullpath = os.path.join(self.download_path, filename)
-            if os.path.isfile(fullpath):
-                yield fullpath
+        # DirEntry.is_file() uses the file type read with the directory
+        # entries, no stat() call per file is needed.
+        with os.scandir(self.download_path) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    yield entry.path
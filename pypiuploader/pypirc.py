@@ -1,9 +1,7 @@
 """Reading .pypirc file."""
 
-try:
-    import configparser
-except ImportError:  # pragma: no cover
-    import ConfigParser as configparser
+import configparser
+import functools
 import os
 
 from . import exceptions
@@ -48,16 +46,21 @@ class RCParser(object):
         If the **path** doesn't exist, raise :exc:`exceptions.ConfigFileError`.
         Otherwise return a new :class:`RCParser` instance.
 
+        The parsed file is cached until its modification time changes,
+        so the instances may share their :attr:`config`.
+
         :param path:
             Optional path to the config file to parse.
             If not given, use ``'~/.pypirc'``.
 
         """
         path = path or cls.CONFIG_PATH
-        if not os.path.exists(path):
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
             error = 'Config file not found: {0!r}'.format(path)
             raise exceptions.ConfigFileError(error)
-        config = read_config(path)
+        config = _read_config_cached(path, mtime)
         return cls(config)
 
     def get_repository_config(self, repository):
@@ -126,3 +129,9 @@ def read_config(path):
     config = configparser.ConfigParser()
     config.read(path)
     return config
+
+
+@functools.lru_cache(maxsize=32)
+def _read_config_cached(path, mtime):
+    # ``mtime`` is only part of the cache key, a modified file is re-read.
+    return read_config(path)
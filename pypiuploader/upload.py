@@ -1,13 +1,32 @@
 """Packages uploading."""
 
+import contextlib
 import os.path
+import time
+import types
 
 import requests
+from requests import adapters
+from requests_toolbelt.multipart import encoder
+from urllib3.util import retry
 
 from . import exceptions
 from . import pypirc
 
 
+#: How many times a failed upload is retried.
+MAX_RETRIES = 3
+
+#: Delay before the first retry in seconds, doubled for each next one.
+RETRY_BACKOFF = 0.3
+
+#: HTTP statuses of transient server errors for which uploads are retried.
+RETRY_STATUSES = frozenset([500, 502, 503, 504])
+
+#: Form fields sent with every upload, shared by all the uploaders.
+_UPLOAD_DATA = types.MappingProxyType({':action': 'file_upload'})
+
+
 class PackageUploader(object):
 
     """Uploads source distributions to a PyPI server.
@@ -28,24 +47,47 @@ class PackageUploader(object):
         Optional username for HTTP authentication.
     :param password:
         Optional password for HTTP authentication.
+    :param pool_size:
+        Maximum number of connections kept open to the server.  Should be
+        at least the number of threads uploading through this instance.
+    :param session:
+        Optional :class:`requests.Session` to upload through, e.g. to share
+        its connections with other uploaders.  Its adapters are used as
+        they are, the **pool_size** and the connection retries only apply
+        to the session made when none is given.  The session's auth is set
+        if a **username** is given.
 
     """
 
-    def __init__(self, host, username=None, password=None):
+    def __init__(
+            self,
+            host,
+            username=None,
+            password=None,
+            pool_size=adapters.DEFAULT_POOLSIZE,
+            session=None):
         self.host = host
         self.username = username
         self.password = password
-        self._data = {':action': 'file_upload'}
-        self._session = requests.Session()
+        self._data = _UPLOAD_DATA
+        if session is None:
+            session = _make_session(pool_size)
+        self._session = session
         if username:
             self._session.auth = self.username, self.password
 
     @classmethod
     def from_rc_file(
-            cls, repository, username=None, password=None, config_path=None):
+            cls,
+            repository,
+            username=None,
+            password=None,
+            config_path=None,
+            pool_size=adapters.DEFAULT_POOLSIZE):
         """Instantiate the uploader using configuration from .pypirc file.
 
-        Read the rc file using :class:`.pypirc.RCParser`.
+        Read the rc file using :class:`.pypirc.RCParser`.  Each rc file is
+        parsed again only when it is modified.
 
         Use the **repository**'s authentication config from the rc file,
         if the file exists and the repository section is defined.
@@ -54,6 +96,9 @@ class PackageUploader(object):
 
         If the rc file or the section for the **repository** doesn't exist,
         use the **repository** argument as the server host.
+        If the **repository** is a URL and both **username** and
+        **password** are given, the rc file couldn't change anything and
+        isn't read at all.
 
         Return a new instance of :class:`PackageUploader`.
 
@@ -65,8 +110,12 @@ class PackageUploader(object):
             Optional password for authentication.
         :param config_path:
             Optional config path to use instead of ``~/.pypirc``.
+        :param pool_size:
+            Maximum number of connections kept open to the server.
 
         """
+        if username and password and '://' in repository:
+            return cls(repository, username, password, pool_size)
         try:
             parser = pypirc.RCParser.from_file(config_path)
         except exceptions.ConfigFileError:
@@ -75,13 +124,21 @@ class PackageUploader(object):
             config = parser.get_repository_config(repository)
         if config:
             uploader = cls.from_repository_config(
-                config, username=username, password=password)
+                config,
+                username=username,
+                password=password,
+                pool_size=pool_size)
         else:
-            uploader = cls(repository, username, password)
+            uploader = cls(repository, username, password, pool_size)
         return uploader
 
     @classmethod
-    def from_repository_config(cls, repo_config, username=None, password=None):
+    def from_repository_config(
+            cls,
+            repo_config,
+            username=None,
+            password=None,
+            pool_size=adapters.DEFAULT_POOLSIZE):
         """Instantiate the uploader using repository configuration dictionary.
 
         Examples::
@@ -113,16 +170,23 @@ class PackageUploader(object):
             Optional username to override the one from the **repo_cofig**.
         :param password:
             Optional password to override the one from the **repo_cofig**.
+        :param pool_size:
+            Maximum number of connections kept open to the server.
 
         """
         host = repo_config['repository']
         username = username or repo_config['username']
         password = password or repo_config['password']
-        return cls(host, username, password)
+        return cls(host, username, password, pool_size)
 
     def upload(self, filepath):
         """Upload a package under the given path.
 
+        The file is streamed to the server, it is never loaded into memory
+        as a whole.  On connection errors and on server errors listed in
+        :data:`RETRY_STATUSES` the upload is retried up to
+        :data:`MAX_RETRIES` times.
+
         Return :class:`requests.Response` from the PyPI server.
 
         If the package is already uploaded, raise
@@ -133,26 +197,106 @@ class PackageUploader(object):
             A path to the package file you want to upload.
 
         """
-        files = self._make_request_files(filepath)
-        response = self._session.post(self.host, data=self._data, files=files)
+        with open(filepath, 'rb') as package:
+            response = self._post([(filepath, package)])
         self._raise_for_status(response, filepath)
         return response
 
-    def _make_request_files(self, filepath):
-        filename = os.path.basename(filepath)
-        content = self._read_file(filepath)
-        return {'content': (filename, content)}
+    def upload_many(self, filepaths):
+        """Upload packages under the given paths in a single request.
 
-    def _read_file(self, filepath):
-        with open(filepath, 'rb') as buf:
-            content = buf.read()
-        return content
+        All the files are sent in one multipart request, each one as
+        a ``content`` field.  The PyPI server must accept more than one file
+        per upload request, the standard upload API takes only one.
+
+        Return :class:`requests.Response` from the PyPI server.
+
+        If the server responds that a package is already uploaded, raise
+        :exc:`.exceptions.PackageConflictError`.
+        On other errors raise :class:`requests.exceptions.HTTPError`.
+
+        :param filepaths:
+            A list of paths to the package files you want to upload.
+
+        """
+        with contextlib.ExitStack() as stack:
+            packages = [
+                (filepath, stack.enter_context(open(filepath, 'rb')))
+                for filepath in filepaths
+            ]
+            response = self._post(packages)
+        self._raise_for_status(response, ', '.join(filepaths))
+        return response
+
+    def _post(self, packages):
+        for attempt in range(MAX_RETRIES + 1):
+            if attempt:
+                time.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+                for __, package in packages:
+                    package.seek(0)
+            body = self._make_request_body(packages)
+            response = self._session.post(
+                self.host,
+                data=body,
+                headers={'Content-Type': body.content_type})
+            if response.status_code not in RETRY_STATUSES:
+                break
+        return response
+
+    def _make_request_body(self, packages):
+        fields = list(self._data.items())
+        for filepath, package in packages:
+            files = self._make_request_files(filepath, package)
+            fields.extend(files.items())
+        return encoder.MultipartEncoder(fields=fields)
+
+    def _make_request_files(self, filepath, package):
+        filename = os.path.basename(filepath)
+        return {'content': (filename, package)}
 
     def _raise_for_status(self, response, filepath):
-        try:
-            response.raise_for_status()
-        except requests.HTTPError as exc:
-            if exc.response.status_code == 409:
-                error = 'Package {0} already uploaded.'.format(filepath)
-                raise exceptions.PackageConflictError(error)
-            raise
+        error = _classify_status(
+            response.status_code, response.reason, response.url, filepath)
+        if isinstance(error, requests.HTTPError):
+            error.response = response
+            error.request = response.request
+        if error is not None:
+            raise error
+
+
+def _classify_status(status_code, reason, url, filepath):
+    """Return the error for an upload response status, ``None`` if it's OK.
+
+    HTTP errors are the same as ``response.raise_for_status()`` raises,
+    but without the response set.
+
+    """
+    if status_code == 409:
+        error = 'Package {0} already uploaded.'.format(filepath)
+        return exceptions.PackageConflictError(error)
+    if 400 <= status_code < 500:
+        kind = 'Client'
+    elif 500 <= status_code < 600:
+        kind = 'Server'
+    else:
+        return None
+    error = '{0} {1} Error: {2} for url: {3}'.format(
+        status_code, kind, reason, url)
+    return requests.HTTPError(error)
+
+
+def _make_session(pool_size):
+    session = requests.Session()
+    # Only retry failures to connect here, the request body is streamed
+    # and can't be sent again by urllib3.  Uploads are retried on server
+    # errors in upload().
+    max_retries = retry.Retry(
+        total=MAX_RETRIES,
+        read=False,
+        backoff_factor=RETRY_BACKOFF)
+    adapter = adapters.HTTPAdapter(
+        pool_maxsize=pool_size,
+        max_retries=max_retries)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
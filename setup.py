@@ -6,11 +6,14 @@ from setuptools import setup
 from setuptools.command.test import test as TestCommand
 
 
+VERSION_RE = re.compile(r"__version__ = '([^']+)'", re.M)
+
+
 def get_version():
     """Extract and return version number from the packages '__init__.py'."""
     init_path = os.path.join('pypiuploader', '__init__.py')
     content = read_file(init_path)
-    match = re.search(r"__version__ = '([^']+)'", content, re.M)
+    match = VERSION_RE.search(content)
     version = match.group(1)
     return version
 
@@ -47,10 +50,11 @@ class PyTest(TestCommand):
 
 install_requires = [
     'requests',
+    'requests-toolbelt',
+    'urllib3',
     'pip>=8',
 ]
 tests_require = [
-    'mock',
     'pytest',
     'pytest-cov',
     'pytest-flakes',
@@ -65,6 +69,7 @@ setup(
     description='Upload source distributions to your PyPI server.',
     long_description_content_type=read_file('README.rst'),
     url='https://github.com/victorwang0526/pypi_uploader',
+    python_requires='>=3.6',
     install_requires=install_requires,
     tests_require=tests_require,
     license=read_file('LICENSE'),
@@ -76,10 +81,14 @@ setup(
         'Natural Language :: English',
         'Operating System :: Unix',
         'Programming Language :: Python',
-        'Programming Language :: Python :: 2.6',
-        'Programming Language :: Python :: 2.7',
-        'Programming Language :: Python :: 3.3',
-        'Programming Language :: Python :: 3.4',
+        'Programming Language :: Python :: 3',
+        'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
     ],
     packages=['pypiuploader'],
     include_package_data=True,
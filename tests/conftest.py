@@ -0,0 +1,70 @@
+"""Fixtures shared by the tests."""
+
+import io
+from unittest import mock
+
+import pytest
+
+from pypiuploader import download
+from pypiuploader import pypirc
+from pypiuploader import upload
+from . import utils
+
+
+@pytest.fixture(autouse=True)
+def clear_rc_cache():
+    pypirc._read_config_cached.cache_clear()
+
+
+@pytest.fixture(scope='session')
+def pypirc_file(tmp_path_factory):
+    """Path to a config file with :data:`utils.PYPIRC` content.
+
+    Written once per test session, the tests must not modify it.
+
+    """
+    path = tmp_path_factory.mktemp('pypirc') / '.pypirc'
+    path.write_bytes(utils.PYPIRC)
+    return str(path)
+
+
+@pytest.fixture
+def stdout():
+    """In-memory standard output for the commands."""
+    return io.StringIO()
+
+
+@pytest.fixture(scope='session')
+def uploader_spec():
+    """Autospec of :class:`pypiuploader.upload.PackageUploader` instances.
+
+    Built once per test session, use the :func:`uploader` fixture to get
+    it reset for a test.
+
+    """
+    return mock.create_autospec(upload.PackageUploader, instance=True)
+
+
+@pytest.fixture
+def uploader(uploader_spec):
+    """Uploader mock with no recorded calls, uploading to localhost.
+
+    Return values and side effects set by earlier tests are cleared too.
+
+    """
+    uploader_spec.reset_mock(return_value=True, side_effect=True)
+    uploader_spec.host = 'http://localhost:8000'
+    return uploader_spec
+
+
+@pytest.fixture
+def download_mock():
+    """Autospec of :meth:`pypiuploader.download.PackageDownloader.download`.
+
+    Patched on the class for the duration of a test.
+
+    """
+    patch = mock.patch.object(
+        download.PackageDownloader, 'download', autospec=True)
+    with patch as download_mock:
+        yield download_mock
@@ -1,172 +1,294 @@
 """Tests for :mod:`pypiuploader.commands`."""
 
 import argparse
+from concurrent import futures
 import io
 import sys
+from unittest import mock
+
 import pytest
+import requests
 
 from pypiuploader import commands
-from pypiuploader import download
 from pypiuploader import exceptions
 from pypiuploader import pypirc
 from pypiuploader import upload
 
-if sys.version_info[0] == 2:
-    StdOutIO = io.BytesIO
-else:
-    StdOutIO = io.StringIO
 
-try:
-    from unittest import mock
-except ImportError:
-    import mock
+#: Expected upload calls for ``mock`` and ``coverage`` package files.
+_UPLOAD_CALLS = [
+    mock.call('packages/mock-1.0.1.tar.gz'),
+    mock.call('packages/coverage-3.7.1.tar.gz'),
+]
+
+_COMMON_OPTIONS = {
+    'index': 'internal',
+    'username': None,
+    'password': None,
+    'jobs': 1,
+    'batch': False,
+}
+_DEFAULT_OPTIONS = {
+    'files': dict(_COMMON_OPTIONS, files=['mock']),
+    'packages': dict(
+        _COMMON_OPTIONS,
+        packages=['mock'],
+        download_dir=None,
+        no_use_wheel=False),
+    'requirements': dict(
+        _COMMON_OPTIONS,
+        requirements_file='requirements.txt',
+        download_dir=None,
+        no_use_wheel=False),
+}
+
+
+def _make_options(command, **overrides):
+    """Return options of ``command`` as parsed by :func:`parse_args`."""
+    options = dict(_DEFAULT_OPTIONS[command], command=command)
+    options.update(overrides)
+    return argparse.Namespace(**options)
 
 
 class TestParseArgs(object):
 
     """Tests for :func:`pypiuploader.commands.parse_args`."""
 
-    def test_no_arguments(self):
-        argv = []
+    @pytest.mark.parametrize('argv', [
+        [],
+        ['files', 'mock'],
+        ['files', 'requests==1.0.1', 'mock', '-i', 'internal',
+         '--no-use-wheel'],
+        ['files', 'mock', '-i', 'internal', '-j', '0'],
+        ['files', 'mock', '-i', 'internal', '-j', 'foo'],
+        ['files', 'mock', '-i', 'internal', 'requests==1.0.1'],
+    ], ids=[
+        'no_arguments',
+        'no_index_url',
+        'files_no_use_wheel',
+        'jobs_not_positive',
+        'jobs_not_integer',
+        'files_split_by_options',
+    ])
+    def test_invalid(self, argv):
         with pytest.raises(SystemExit):
             commands.parse_args(argv)
 
-    def test_no_index_url(self):
-        argv = ['files', 'mock']
-        with pytest.raises(SystemExit):
-            commands.parse_args(argv)
-
-    def test_index_url(self):
-        argv = ['files', 'mock', '--index-url', 'internal']
+    @pytest.mark.parametrize('argv, expected', [
+        (['files', 'mock', '--index-url', 'internal'],
+         {'index': 'internal'}),
+        (['files', 'mock', '-i', 'internal'],
+         {'index': 'internal'}),
+        (['files', 'mock', '--index-url=internal'],
+         {'index': 'internal', 'command': 'files', 'files': ['mock']}),
+        (['files', 'requests==1.0.1', 'mock', '-i', 'internal'],
+         {'command': 'files', 'files': ['requests==1.0.1', 'mock']}),
+        (['packages', 'requests==1.0.1', 'mock', '-i', 'internal'],
+         {'command': 'packages', 'packages': ['requests==1.0.1', 'mock'],
+          'no_use_wheel': False}),
+        (['packages', 'mock', '-i', 'internal',
+          '--download-dir', '~/.packages'],
+         {'download_dir': '~/.packages', 'command': 'packages',
+          'packages': ['mock']}),
+        (['packages', 'mock', '-i', 'internal', '-d', '~/.packages'],
+         {'download_dir': '~/.packages', 'command': 'packages',
+          'packages': ['mock']}),
+        (['packages', 'mock', '-i', 'internal', '--no-use-wheel'],
+         {'no_use_wheel': True, 'command': 'packages'}),
+        (['requirements', 'requirements.txt', '-i', 'internal'],
+         {'command': 'requirements', 'requirements_file': 'requirements.txt',
+          'no_use_wheel': False}),
+        (['requirements', 'requirements.txt', '-i', 'internal',
+          '--download-dir', '~/.packages'],
+         {'download_dir': '~/.packages', 'command': 'requirements',
+          'requirements_file': 'requirements.txt'}),
+        (['requirements', 'requirements.txt', '-i', 'internal',
+          '-d', '~/.packages'],
+         {'download_dir': '~/.packages', 'command': 'requirements',
+          'requirements_file': 'requirements.txt'}),
+        (['requirements', 'requirements.txt', '-i', 'internal',
+          '--no-use-wheel'],
+         {'no_use_wheel': True, 'command': 'requirements'}),
+        (['files', 'mock', '-i', 'internal', '--username', 'foo'],
+         {'username': 'foo', 'command': 'files', 'files': ['mock']}),
+        (['files', 'mock', '-i', 'internal', '-u', 'foo'],
+         {'username': 'foo', 'command': 'files', 'files': ['mock']}),
+        (['files', 'mock', '-i', 'internal', '--password', 'bar'],
+         {'password': 'bar', 'command': 'files', 'files': ['mock']}),
+        (['files', 'mock', '-i', 'internal', '-p', 'bar'],
+         {'password': 'bar', 'command': 'files', 'files': ['mock']}),
+        (['files', 'mock', '-i', 'internal'],
+         {'jobs': commands.DEFAULT_JOBS, 'batch': False}),
+        (['packages', 'mock', '-i', 'internal', '--jobs', '3'],
+         {'jobs': 3, 'command': 'packages'}),
+        (['requirements', 'requirements.txt', '-i', 'internal', '-j', '3'],
+         {'jobs': 3, 'command': 'requirements'}),
+        (['files', 'mock', '-i', 'internal', '--batch'],
+         {'batch': True, 'command': 'files'}),
+    ], ids=[
+        'index_url',
+        'index_url_shortcut',
+        'index_url_with_equals_sign',
+        'files',
+        'packages',
+        'packages_download_dir',
+        'packages_download_dir_shortcut',
+        'packages_no_use_wheel',
+        'requirements',
+        'requirements_download_dir',
+        'requirements_download_dir_shortcut',
+        'requirements_no_use_wheel',
+        'username',
+        'username_shortcut',
+        'password',
+        'password_shortcut',
+        'defaults',
+        'jobs',
+        'jobs_shortcut',
+        'batch',
+    ])
+    def test_valid(self, argv, expected):
         options = commands.parse_args(argv)
-        assert options.index == 'internal'
+        for name, value in expected.items():
+            assert getattr(options, name) == value
 
-    def test_index_url_shortcut(self):
-        argv = ['files', 'mock', '-i', 'internal']
-        options = commands.parse_args(argv)
-        assert options.index == 'internal'
+    def test_no_arguments_error(self, capsys):
+        parser = commands._make_parser()
 
-    def test_files(self):
-        argv = ['files', 'requests==1.0.1', 'mock', '-i', 'internal']
-        options = commands.parse_args(argv)
-        assert options.command == 'files'
-        assert options.files == ['requests==1.0.1', 'mock']
+        with pytest.raises(SystemExit) as exc:
+            commands.parse_args([])
 
-    def test_files_no_use_wheel(self):
-        argv = [
-            'files', 'requests==1.0.1', 'mock',
-            '-i', 'internal',
-            '--no-use-wheel',
-        ]
+        assert exc.value.code == 2
+        assert capsys.readouterr().err == (
+            parser.format_usage() +
+            '{0}: error: too few arguments\n'.format(parser.prog)
+        )
+
+    def test_unrecognized_arguments_error(self, capsys):
+        parser = commands._make_parser()
+        argv = ['files', '--index-url=q', '0', '-v']
         with pytest.raises(SystemExit):
+            parser.parse_args(argv)
+        expected_error = capsys.readouterr()[1]
+
+        with pytest.raises(SystemExit) as exc:
             commands.parse_args(argv)
 
-    def test_packages(self):
-        argv = ['packages', 'requests==1.0.1', 'mock', '-i', 'internal']
-        options = commands.parse_args(argv)
-        assert options.command == 'packages'
-        assert options.packages == ['requests==1.0.1', 'mock']
-        assert not options.no_use_wheel
+        assert exc.value.code == 2
+        assert capsys.readouterr()[1] == expected_error
+        assert expected_error.endswith(
+            '{0}: error: unrecognized arguments: -v\n'.format(parser.prog))
 
-    def test_packages_download_dir(self):
-        argv = [
-            'packages', 'mock', '-i', 'internal',
-            '--download-dir', '~/.packages'
-        ]
-        options = commands.parse_args(argv)
-        assert options.download_dir == '~/.packages'
-        assert options.command == 'packages'
-        assert options.packages == ['mock']
-
-    def test_packages_download_dir_shortcut(self):
-        argv = ['packages', 'mock', '-i', 'internal', '-d', '~/.packages']
-        options = commands.parse_args(argv)
-        assert options.download_dir == '~/.packages'
-        assert options.command == 'packages'
-        assert options.packages == ['mock']
+    def test_default_argv(self):
+        argv = ['pypiupload', 'files', 'mock', '-i', 'internal']
+        with mock.patch.object(sys, 'argv', argv):
+            options = commands.parse_args()
+        assert options.command == 'files'
+        assert options.files == ['mock']
 
-    def test_packages_no_use_wheel(self):
-        argv = ['packages', 'mock', '-i', 'internal', '--no-use-wheel']
-        options = commands.parse_args(argv)
-        assert options.no_use_wheel
-        assert options.command == 'packages'
 
-    def test_requirements(self):
-        argv = ['requirements', 'requirements.txt', '-i', 'internal']
-        options = commands.parse_args(argv)
-        assert options.command == 'requirements'
-        assert options.requirements_file == 'requirements.txt'
-        assert not options.no_use_wheel
+class TestMakeParser(object):
 
-    def test_requirements_download_dir(self):
-        argv = [
-            'requirements', 'requirements.txt', '-i', 'internal',
-            '--download-dir', '~/.packages'
-        ]
-        options = commands.parse_args(argv)
-        assert options.download_dir == '~/.packages'
-        assert options.command == 'requirements'
-        assert options.requirements_file == 'requirements.txt'
+    """Tests for :func:`pypiuploader.commands._make_parser`."""
 
-    def test_requirements_download_dir_shortcut(self):
-        argv = [
-            'requirements', 'requirements.txt', '-i', 'internal',
-            '-d', '~/.packages'
-        ]
-        options = commands.parse_args(argv)
-        assert options.download_dir == '~/.packages'
-        assert options.command == 'requirements'
-        assert options.requirements_file == 'requirements.txt'
+    def test_cached(self):
+        assert commands._make_parser() is commands._make_parser()
 
-    def test_requirements_no_use_wheel(self):
-        argv = [
-            'requirements', 'requirements.txt',
-            '-i', 'internal',
-            '--no-use-wheel',
-        ]
-        options = commands.parse_args(argv)
-        assert options.no_use_wheel
-        assert options.command == 'requirements'
 
-    def test_username(self):
-        argv = ['files', 'mock', '-i', 'internal', '--username', 'foo']
-        options = commands.parse_args(argv)
-        assert options.username == 'foo'
-        assert options.command == 'files'
-        assert options.files == ['mock']
+class TestMakeCommandParser(object):
 
-    def test_username_shortcut(self):
-        argv = ['files', 'mock', '-i', 'internal', '-u', 'foo']
-        options = commands.parse_args(argv)
-        assert options.username == 'foo'
-        assert options.command == 'files'
-        assert options.files == ['mock']
+    """Tests for :func:`pypiuploader.commands._make_command_parser`."""
 
-    def test_password(self):
-        argv = ['files', 'mock', '-i', 'internal', '--password', 'bar']
-        options = commands.parse_args(argv)
-        assert options.password == 'bar'
-        assert options.command == 'files'
-        assert options.files == ['mock']
+    def test_cached(self):
+        files_parser = commands._make_command_parser('files')
+        assert commands._make_command_parser('files') is files_parser
+        assert commands._make_command_parser('packages') is not files_parser
 
-    def test_password_shortcut(self):
-        argv = ['files', 'mock', '-i', 'internal', '-p', 'bar']
-        options = commands.parse_args(argv)
-        assert options.password == 'bar'
-        assert options.command == 'files'
-        assert options.files == ['mock']
+    def test_same_as_subparser(self):
+        parser = commands._make_parser()
+        argvs = [
+            ['files', 'mock', '--index-url=internal', '--user', 'foo'],
+            ['packages', 'mock', '-iinternal', '-j2', '--no-use-wheel'],
+            ['requirements', 'requirements.txt', '-i', 'a', '-d', 'b'],
+        ]
+        for argv in argvs:
+            command_parser = commands._make_command_parser(argv[0])
+            options = command_parser.parse_args(argv[1:])
+            assert options == parser.parse_args(argv), argv
+
+    def test_help_same_as_subparser(self, capsys):
+        parser = commands._make_parser()
+        for command in ('files', 'packages', 'requirements'):
+            with pytest.raises(SystemExit):
+                parser.parse_args([command, '--help'])
+            expected_help = capsys.readouterr()[0]
+            with pytest.raises(SystemExit):
+                commands.parse_args([command, '--help'])
+            assert capsys.readouterr()[0] == expected_help
+
+
+class TestScanArgs(object):
+
+    """Tests for :func:`pypiuploader.commands._scan_args`."""
+
+    def test_same_as_argparse(self):
+        parser = commands._make_parser()
+        argvs = [
+            ['files', 'mock', '-i', 'internal'],
+            ['files', '-i', 'internal', 'mock', 'requests==1.0.1'],
+            ['files', 'mock', '-i', 'a', '-u', 'foo', '-p', 'bar', '-j', '2'],
+            ['files', 'mock', '--index-url', 'a', '--username', 'foo',
+             '--password', 'bar', '--jobs', '2'],
+            ['files', 'mock', '-i', 'a', '-i', 'b'],
+            ['packages', 'mock', 'requests', '-i', 'internal'],
+            ['packages', 'mock', '-i', 'internal', '-d', '~/.packages',
+             '--no-use-wheel'],
+            ['packages', '--no-use-wheel', 'mock', '--download-dir', 'pkgs',
+             '-i', 'internal'],
+            ['requirements', 'requirements.txt', '-i', 'internal'],
+            ['requirements', '-i', 'internal', 'requirements.txt',
+             '-d', 'pkgs', '--no-use-wheel', '-j', '1'],
+            ['files', 'mock', '-i', 'internal', '--batch'],
+            ['packages', '--batch', 'mock', '-i', 'internal'],
+        ]
+        for argv in argvs:
+            options = commands._scan_args(argv)
+            assert options is not None, argv
+            assert options == parser.parse_args(argv), argv
+
+    def test_not_plain_arguments(self):
+        argvs = [
+            [],
+            ['-h'],
+            ['--version'],
+            ['upload', 'mock', '-i', 'internal'],
+            ['files', '-i', 'internal'],
+            ['files', 'mock'],
+            ['files', 'mock', '-i'],
+            ['files', 'mock', '-i', '-u'],
+            ['files', 'mock', '-iinternal'],
+            ['files', 'mock', '--index-url=internal'],
+            ['files', 'mock', '--index', 'internal'],
+            ['files', 'mock', '-i', 'internal', '-h'],
+            ['files', 'mock', '-i', 'internal', 'requests'],
+            ['files', 'mock', '-i', 'internal', '--no-use-wheel'],
+            ['files', 'mock', '-i', 'internal', '-d', 'pkgs'],
+            ['files', 'mock', '-i', 'internal', '-j', '0'],
+            ['files', 'mock', '-i', 'internal', '-j', 'foo'],
+            ['files', 'mock', '-i', 'internal', '--', '-mock'],
+            ['files', 'mock', '-i', 'internal', '--bat'],
+            ['requirements', 'a.txt', 'b.txt', '-i', 'internal'],
+        ]
+        for argv in argvs:
+            assert commands._scan_args(argv) is None, argv
 
 
 class TestCommand(object):
 
     """Tests for :func:`pypiuploader.commands.Command`."""
 
-    def test_init(self):
-        options = argparse.Namespace(
-            command='requirements',
-            index='internal',
-            requirements_file='requirements.txt')
-        stdout = StdOutIO()
+    def test_init(self, stdout):
+        options = _make_options('requirements')
 
         command = commands.Command(options, stdout=stdout)
 
@@ -174,20 +296,22 @@ class TestCommand(object):
         assert command.stdout == stdout
 
     def test_init_default_stdout(self):
-        options = argparse.Namespace()
+        options = _make_options('files')
 
         command = commands.Command(options)
 
         assert command.options == options
         assert command.stdout == sys.stdout
 
-    @mock.patch.object(pypirc.RCParser, 'from_file')
+    @mock.patch.object(pypirc.RCParser, 'from_file', autospec=True)
     def test_make_uploader(self, from_file_mock):
         from_file_mock.side_effect = exceptions.ConfigFileError
-        options = argparse.Namespace(
+        options = _make_options(
+            'files',
             index='http://localhost:8000',
             username='foo',
-            password='bar')
+            password='bar',
+            jobs=16)
         command = commands.Command(options)
 
         uploader = command._make_uploader()
@@ -195,18 +319,19 @@ class TestCommand(object):
         assert uploader.host == 'http://localhost:8000'
         assert uploader.username == 'foo'
         assert uploader.password == 'bar'
+        adapter = uploader._session.get_adapter('http://localhost:8000')
+        assert adapter._pool_maxsize == 16
 
-    @mock.patch.object(download.PackageDownloader, 'download', autospec=True)
     def test_download_packages(self, download_mock):
         download_return_value = [
             'packages/coverage-3.7.1.tar.gz',
             'packages/mock-1.0.1.tar.gz',
         ]
         download_mock.return_value = download_return_value
-        options = argparse.Namespace(
+        options = _make_options(
+            'packages',
             download_dir='~/packages',
-            packages=['coverage==3.7.1', 'mock'],
-            no_use_wheel=False)
+            packages=['coverage==3.7.1', 'mock'])
         command = commands.Command(options)
 
         filenames = command._download()
@@ -222,17 +347,13 @@ class TestCommand(object):
             no_use_wheel=False)
         assert download_mock.call_args == expected_call
 
-    @mock.patch.object(download.PackageDownloader, 'download', autospec=True)
     def test_download_requirements_file(self, download_mock):
         download_return_value = [
             'packages/coverage-3.7.1.tar.gz',
             'packages/mock-1.0.1.tar.gz',
         ]
         download_mock.return_value = download_return_value
-        options = argparse.Namespace(
-            download_dir='~/packages',
-            requirements_file='requirements.txt',
-            no_use_wheel=False)
+        options = _make_options('requirements', download_dir='~/packages')
         command = commands.Command(options)
 
         filenames = command._download()
@@ -248,12 +369,8 @@ class TestCommand(object):
             no_use_wheel=False)
         assert download_mock.call_args == expected_call
 
-    @mock.patch.object(download.PackageDownloader, 'download', autospec=True)
     def test_download_requirements_file_no_use_wheel(self, download_mock):
-        options = argparse.Namespace(
-            requirements_file='requirements.txt',
-            download_dir=None,
-            no_use_wheel=True)
+        options = _make_options('requirements', no_use_wheel=True)
         command = commands.Command(options)
 
         command._download()
@@ -267,75 +384,166 @@ class TestCommand(object):
             no_use_wheel=True)
         assert download_mock.call_args == expected_call
 
-    def test_print(self):
-        options = argparse.Namespace()
-        stdout = StdOutIO()
+    def test_print(self, stdout):
+        options = _make_options('files')
         command = commands.Command(options, stdout=stdout)
 
         command._print('Foo bar\n')
         command._print('baz\n')
 
-        stdout.seek(0)
-        assert stdout.read() == 'Foo bar\nbaz\n'
+        assert stdout.getvalue() == 'Foo bar\nbaz\n'
+
+    def test_print_many(self):
+        options = _make_options('files')
+        stdout = mock.Mock(spec=io.StringIO)
+        command = commands.Command(options, stdout=stdout)
+
+        command._print('Foo ', 'bar\n')
+
+        assert stdout.method_calls == [mock.call.writelines(('Foo ', 'bar\n'))]
 
-    def test_upload_file(self):
-        options = argparse.Namespace()
-        stdout = StdOutIO()
+    def test_wait_for_upload(self, stdout):
+        options = _make_options('files')
         command = commands.Command(options, stdout=stdout)
-        uploader = mock.create_autospec(upload.PackageUploader)
+        future = futures.Future()
+        future.set_result(requests.Response())
 
-        command._upload_file(uploader, 'mock-1.0.1.tar.gz')
+        command._wait_for_upload('mock-1.0.1.tar.gz', future)
 
-        stdout.seek(0)
-        assert uploader.upload.call_args == mock.call('mock-1.0.1.tar.gz')
-        assert stdout.read() == 'Uploading mock-1.0.1.tar.gz... success.\n'
+        assert stdout.getvalue() == 'Uploading mock-1.0.1.tar.gz... success.\n'
 
-    def test_upload_file_conflict(self):
-        options = argparse.Namespace()
-        stdout = StdOutIO()
+    def test_wait_for_upload_conflict(self, stdout):
+        options = _make_options('files')
         command = commands.Command(options, stdout=stdout)
-        uploader = mock.create_autospec(upload.PackageUploader)
-        uploader.upload.side_effect = exceptions.PackageConflictError('foo')
+        future = futures.Future()
+        future.set_exception(exceptions.PackageConflictError('foo'))
 
-        command._upload_file(uploader, 'mock-1.0.1.tar.gz')
+        command._wait_for_upload('mock-1.0.1.tar.gz', future)
 
-        stdout.seek(0)
-        assert uploader.upload.call_args == mock.call('mock-1.0.1.tar.gz')
-        assert stdout.read() == (
+        assert stdout.getvalue() == (
             'Uploading mock-1.0.1.tar.gz... already uploaded.\n'
         )
 
-    def test_upload_files(self):
-        options = argparse.Namespace()
-        stdout = StdOutIO()
+    def test_wait_for_upload_error(self, stdout):
+        options = _make_options('files')
         command = commands.Command(options, stdout=stdout)
-        uploader = mock.create_autospec(
-            upload.PackageUploader,
-            host='http://localhost:8000')
-        upload_results = [None, exceptions.PackageConflictError('foo')]
-
-        def upload_side_effect(*args):
-            result = upload_results.pop()
-            if isinstance(result, Exception):
-                raise result
-            return result
-        uploader.upload.side_effect = upload_side_effect
+        future = futures.Future()
+        future.set_exception(requests.HTTPError('foo'))
+
+        with pytest.raises(requests.HTTPError):
+            command._wait_for_upload('mock-1.0.1.tar.gz', future)
+
+        assert stdout.getvalue() == 'Uploading mock-1.0.1.tar.gz... failed.\n'
+
+    def test_upload_files(self, uploader, stdout):
+        options = _make_options('files')
+        command = commands.Command(options, stdout=stdout)
+        uploader.upload.side_effect = iter([
+            exceptions.PackageConflictError('foo'),
+            None,
+        ])
 
         command._upload_files(
             uploader,
             ['packages/mock-1.0.1.tar.gz', 'packages/coverage-3.7.1.tar.gz'])
 
-        stdout.seek(0)
-        assert uploader.upload.call_args_list == [
-            mock.call('packages/mock-1.0.1.tar.gz'),
-            mock.call('packages/coverage-3.7.1.tar.gz'),
-        ]
-        assert stdout.read() == (
+        assert uploader.upload.call_args_list == _UPLOAD_CALLS
+        assert stdout.getvalue() == (
             'Uploading packages to http://localhost:8000\n'
             'Uploading packages/mock-1.0.1.tar.gz... already uploaded.\n'
             'Uploading packages/coverage-3.7.1.tar.gz... success.\n'
         )
 
+    def test_upload_files_in_parallel(self, uploader, stdout):
+        options = _make_options('files', jobs=4)
+        command = commands.Command(options, stdout=stdout)
+        conflicts = set(['packages/mock-1.0.1.tar.gz'])
+
+        def upload_side_effect(filename):
+            if filename in conflicts:
+                raise exceptions.PackageConflictError(filename)
+        uploader.upload.side_effect = upload_side_effect
+        filenames = [
+            'packages/coverage-3.7.1.tar.gz',
+            'packages/mock-1.0.1.tar.gz',
+            'packages/requests-2.2.1.tar.gz',
+        ]
+
+        command._upload_files(uploader, filenames)
+
+        calls = uploader.upload.call_args_list
+        assert sorted(call[0][0] for call in calls) == filenames
+        assert stdout.getvalue() == (
+            'Uploading packages to http://localhost:8000\n'
+            'Uploading packages/coverage-3.7.1.tar.gz... success.\n'
+            'Uploading packages/mock-1.0.1.tar.gz... already uploaded.\n'
+            'Uploading packages/requests-2.2.1.tar.gz... success.\n'
+        )
+
+    def test_upload_batch(self, uploader, stdout):
+        options = _make_options('files')
+        command = commands.Command(options, stdout=stdout)
+        filenames = [
+            'packages/mock-1.0.1.tar.gz',
+            'packages/coverage-3.7.1.tar.gz',
+        ]
+
+        command._upload_batch(uploader, iter(filenames))
+
+        assert uploader.upload_many.call_args == mock.call(filenames)
+        assert stdout.getvalue() == (
+            'Uploading packages to http://localhost:8000\n'
+            'Uploading 2 packages... success.\n'
+        )
+
+    def test_upload_batch_no_files(self, uploader, stdout):
+        options = _make_options('files')
+        command = commands.Command(options, stdout=stdout)
+
+        command._upload_batch(uploader, iter([]))
+
+        assert not uploader.upload_many.called
+        assert stdout.getvalue() == (
+            'Uploading packages to http://localhost:8000\n'
+        )
+
+    def test_upload_batch_conflict(self, uploader, stdout):
+        options = _make_options('files')
+        command = commands.Command(options, stdout=stdout)
+        uploader.upload_many.side_effect = (
+            exceptions.PackageConflictError('foo'))
+
+        command._upload_batch(uploader, ['packages/mock-1.0.1.tar.gz'])
+
+        assert stdout.getvalue() == (
+            'Uploading packages to http://localhost:8000\n'
+            'Uploading 1 packages... already uploaded.\n'
+        )
+
+    def test_upload_batch_error(self, uploader, stdout):
+        options = _make_options('files')
+        command = commands.Command(options, stdout=stdout)
+        uploader.upload_many.side_effect = requests.HTTPError('foo')
+
+        with pytest.raises(requests.HTTPError):
+            command._upload_batch(uploader, ['packages/mock-1.0.1.tar.gz'])
+
+        assert stdout.getvalue() == (
+            'Uploading packages to http://localhost:8000\n'
+            'Uploading 1 packages... failed.\n'
+        )
+
+    def test_upload_files_error(self, uploader, stdout):
+        options = _make_options('files')
+        command = commands.Command(options, stdout=stdout)
+        uploader.upload.side_effect = requests.HTTPError('foo')
+
+        with pytest.raises(requests.HTTPError):
+            command._upload_files(
+                uploader,
+                ['packages/mock-1.0.1.tar.gz',
+                 'packages/coverage-3.7.1.tar.gz'])
+
     @mock.patch.object(commands.Command, '_download', autospec=True)
     def test_get_filenames_for_packages_command(self, download_mock):
         download_return_value = [
@@ -343,7 +551,7 @@ class TestCommand(object):
             'packages/mock-1.0.1.tar.gz',
         ]
         download_mock.return_value = download_return_value
-        options = argparse.Namespace(command='packages')
+        options = _make_options('packages')
         command = commands.Command(options)
 
         filenames = command._get_filenames()
@@ -357,7 +565,7 @@ class TestCommand(object):
             'packages/mock-1.0.1.tar.gz',
         ]
         download_mock.return_value = download_return_value
-        options = argparse.Namespace(command='requirements')
+        options = _make_options('requirements')
         command = commands.Command(options)
 
         filenames = command._get_filenames()
@@ -370,7 +578,7 @@ class TestCommand(object):
             'packages/coverage-3.7.1.tar.gz',
             'packages/mock-1.0.1.tar.gz',
         ]
-        options = argparse.Namespace(command='files', files=files)
+        options = _make_options('files', files=files)
         command = commands.Command(options)
 
         filenames = command._get_filenames()
@@ -382,15 +590,15 @@ class TestCommand(object):
     @mock.patch.object(commands.Command, '_get_filenames', autospec=True)
     @mock.patch.object(commands.Command, '_make_uploader', autospec=True)
     def test_run(
-            self, make_uploader_mock, get_filenames_mock, upload_files_mock):
-        uploader = mock.create_autospec(upload.PackageUploader)
+            self, make_uploader_mock, get_filenames_mock, upload_files_mock,
+            uploader):
         filenames = [
             'packages/coverage-3.7.1.tar.gz',
             'packages/mock-1.0.1.tar.gz',
         ]
         make_uploader_mock.return_value = uploader
         get_filenames_mock.return_value = filenames
-        options = argparse.Namespace()
+        options = _make_options('files')
         command = commands.Command(options)
 
         command.run()
@@ -400,22 +608,64 @@ class TestCommand(object):
         assert get_filenames_mock.called
         assert upload_files_mock.call_args == expected_call
 
+    @mock.patch.object(commands.Command, '_upload_batch', autospec=True)
+    @mock.patch.object(commands.Command, '_upload_files', autospec=True)
+    @mock.patch.object(commands.Command, '_get_filenames', autospec=True)
+    @mock.patch.object(commands.Command, '_make_uploader', autospec=True)
+    def test_run_batch(
+            self,
+            make_uploader_mock,
+            get_filenames_mock,
+            upload_files_mock,
+            upload_batch_mock,
+            uploader):
+        filenames = [
+            'packages/coverage-3.7.1.tar.gz',
+            'packages/mock-1.0.1.tar.gz',
+        ]
+        make_uploader_mock.return_value = uploader
+        get_filenames_mock.return_value = filenames
+        options = _make_options('files', batch=True)
+        command = commands.Command(options)
 
-class TestMain(object):
+        command.run()
 
-    """Tests for :func:`pypiuploader.commands.main`."""
+        expected_call = mock.call(command, uploader, filenames)
+        assert not upload_files_mock.called
+        assert upload_batch_mock.call_args == expected_call
 
     @mock.patch.object(upload.PackageUploader, 'upload', autospec=True)
-    def test_files(self, upload_mock):
-        upload_results = [None, exceptions.PackageConflictError('foo')]
+    @mock.patch.object(pypirc.RCParser, 'from_file', autospec=True)
+    def test_run_options_without_jobs_and_batch(
+            self, from_file_mock, upload_mock, stdout):
+        from_file_mock.side_effect = exceptions.ConfigFileError
+        options = _make_options('files', files=['packages/mock-1.0.1.tar.gz'])
+        del options.jobs, options.batch
+        command = commands.Command(options, stdout=stdout)
 
-        def upload_side_effect(*args):
-            result = upload_results.pop()
-            if isinstance(result, Exception):
-                raise result
-            return result
+        command.run()
 
-        upload_mock.side_effect = upload_side_effect
+        uploader = upload_mock.call_args[0][0]
+        assert upload_mock.call_args == mock.call(
+            uploader, 'packages/mock-1.0.1.tar.gz')
+        adapter = uploader._session.get_adapter('http://localhost:8000')
+        assert adapter._pool_maxsize == commands.DEFAULT_JOBS
+        assert stdout.getvalue() == (
+            'Uploading packages to internal\n'
+            'Uploading packages/mock-1.0.1.tar.gz... success.\n'
+        )
+
+
+class TestMain(object):
+
+    """Tests for :func:`pypiuploader.commands.main`."""
+
+    @mock.patch.object(upload.PackageUploader, 'upload', autospec=True)
+    def test_files(self, upload_mock, stdout):
+        upload_mock.side_effect = iter([
+            exceptions.PackageConflictError('foo'),
+            None,
+        ])
         argv = [
             'files',
             'packages/coverage-3.7.1.tar.gz',
@@ -423,13 +673,12 @@ class TestMain(object):
             '-i', 'http://localhost:8000',
             '-u', 'foo',
             '-p', 'bar',
+            '-j', '1',
         ]
-        stdout = StdOutIO()
 
         commands.main(argv=argv, stdout=stdout)
 
-        stdout.seek(0)
-        content = stdout.read()
+        content = stdout.getvalue()
         assert content == (
             'Uploading packages to http://localhost:8000\n'
             'Uploading packages/coverage-3.7.1.tar.gz... already uploaded.\n'
@@ -446,18 +695,12 @@ class TestMain(object):
         ]
         assert upload_mock.call_args_list == expected_calls
 
-    @mock.patch.object(download.PackageDownloader, 'download', autospec=True)
     @mock.patch.object(upload.PackageUploader, 'upload', autospec=True)
-    def test_packages(self, upload_mock, download_mock):
-        upload_results = [None, exceptions.PackageConflictError('foo')]
-
-        def upload_side_effect(*args):
-            result = upload_results.pop()
-            if isinstance(result, Exception):
-                raise result
-            return result
-
-        upload_mock.side_effect = upload_side_effect
+    def test_packages(self, upload_mock, download_mock, stdout):
+        upload_mock.side_effect = iter([
+            exceptions.PackageConflictError('foo'),
+            None,
+        ])
         download_mock.return_value = [
             'packages/coverage-3.7.1.tar.gz',
             'packages/mock-1.0.1.tar.gz'
@@ -470,13 +713,12 @@ class TestMain(object):
             '-u', 'foo',
             '-p', 'bar',
             '-d', 'packages',
+            '-j', '1',
         ]
-        stdout = StdOutIO()
 
         commands.main(argv=argv, stdout=stdout)
 
-        stdout.seek(0)
-        content = stdout.read()
+        content = stdout.getvalue()
         assert content == (
             'Uploading packages to http://localhost:8000\n'
             'Uploading packages/coverage-3.7.1.tar.gz... already uploaded.\n'
@@ -504,18 +746,13 @@ class TestMain(object):
         ]
         assert upload_mock.call_args_list == expected_calls
 
-    @mock.patch.object(download.PackageDownloader, 'download', autospec=True)
     @mock.patch.object(upload.PackageUploader, 'upload', autospec=True)
-    def test_requirements_no_download_dir(self, upload_mock, download_mock):
-        upload_results = [None, exceptions.PackageConflictError('foo')]
-
-        def upload_side_effect(*args):
-            result = upload_results.pop()
-            if isinstance(result, Exception):
-                raise result
-            return result
-
-        upload_mock.side_effect = upload_side_effect
+    def test_requirements_no_download_dir(
+            self, upload_mock, download_mock, stdout):
+        upload_mock.side_effect = iter([
+            exceptions.PackageConflictError('foo'),
+            None,
+        ])
         download_mock.return_value = [
             '/tmp/f4Uf/coverage-3.7.1.tar.gz',
             '/tmp/f4Uf/mock-1.0.1.tar.gz'
@@ -526,13 +763,12 @@ class TestMain(object):
             '-i', 'http://localhost:8000',
             '-u', 'foo',
             '-p', 'bar',
+            '-j', '1',
         ]
-        stdout = StdOutIO()
 
         commands.main(argv=argv, stdout=stdout)
 
-        stdout.seek(0)
-        content = stdout.read()
+        content = stdout.getvalue()
         assert content == (
             'Uploading packages to http://localhost:8000\n'
             'Uploading /tmp/f4Uf/coverage-3.7.1.tar.gz... already uploaded.\n'
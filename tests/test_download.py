@@ -2,13 +2,12 @@
 
 import os
 import shutil
+import subprocess
+import sys
 import tempfile
 import types
+from unittest import mock
 
-try:
-    from unittest import mock
-except ImportError:
-    import mock
 import pytest
 
 from pypiuploader import download
@@ -18,16 +17,6 @@ class TestPackageDownloader(object):
 
     """Tests for :class:`pypiuploader.download.PackageDownloader`."""
 
-    def setup(self):
-        self._tmpdirs = []
-
-    def teardown(self):
-        for tmpdir in self._tmpdirs:
-            try:
-                shutil.rmtree(tmpdir)
-            except OSError:
-                pass
-
     def test_init(self):
         downloader = download.PackageDownloader('/foo/bar')
         assert downloader.download_path == '/foo/bar'
@@ -36,9 +25,9 @@ class TestPackageDownloader(object):
         downloader = download.PackageDownloader()
         assert downloader.download_path is None
 
-    def test_make_download_dir(self):
-        tmpdir = self._mkdtemp()
-        download_path = os.path.join(tmpdir, 'packages')
+    def test_make_download_dir(self, tmp_path):
+        tmpdir = tmp_path / 'tmp'
+        download_path = str(tmpdir / 'packages')
         downloader = download.PackageDownloader(download_path)
 
         downloader._make_download_dir()
@@ -49,11 +38,12 @@ class TestPackageDownloader(object):
         downloader._make_download_dir()
         assert os.path.isdir(download_path)
 
-    def test_make_download_dir_when_not_set(self):
+    def test_make_download_dir_when_not_set(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
         downloader = download.PackageDownloader()
         downloader._make_download_dir()
         assert downloader.download_path is not None
-        self._tmpdirs.append(downloader.download_path)
+        assert os.path.dirname(downloader.download_path) == str(tmp_path)
         assert os.path.isdir(downloader.download_path)
 
     def test_build_args_with_requirements(self):
@@ -84,22 +74,23 @@ class TestPackageDownloader(object):
             '-r', 'requirements.txt',
         ]
 
-    def test_list_download_dir(self):
-        download_path = self._mkdtemp()
-        __, package1 = tempfile.mkstemp(dir=download_path)
-        __, package2 = tempfile.mkstemp(dir=download_path)
-        tempfile.mkdtemp(dir=download_path)
-        downloader = download.PackageDownloader(download_path)
+    def test_list_download_dir(self, tmp_path):
+        package1 = tmp_path / 'mock-1.0.1.tar.gz'
+        package2 = tmp_path / 'requests-2.2.1.tar.gz'
+        package1.touch()
+        package2.touch()
+        (tmp_path / 'packages').mkdir()
+        downloader = download.PackageDownloader(str(tmp_path))
 
         paths = downloader._list_download_dir()
 
         assert isinstance(paths, types.GeneratorType)
-        assert sorted(list(paths)) == sorted([package1, package2])
+        assert set(paths) == {str(package1), str(package2)}
 
-    @mock.patch('pip.main', autospec=True)
+    @mock.patch('subprocess.check_call', autospec=True)
     @mock.patch.object(
         download.PackageDownloader, '_list_download_dir', autospec=True)
-    def test_download_requirements(self, list_dir_mock, pip_main_mock):
+    def test_download_requirements(self, list_dir_mock, check_call_mock):
         list_dir_mock.return_value = ('mock-1.0.1.tar.gz',)
         download_path = '/foo/bar'
         downloader = download.PackageDownloader(download_path)
@@ -107,23 +98,28 @@ class TestPackageDownloader(object):
         downloaded = downloader.download(requirements=['mock'])
 
         assert sorted(list(downloaded)) == ['mock-1.0.1.tar.gz']
-        expected_call = mock.call(['download', '-d', download_path, 'mock'])
-        assert pip_main_mock.call_args == expected_call
+        expected_call = mock.call([
+            sys.executable, '-m', 'pip',
+            'download', '-d', download_path, 'mock',
+        ])
+        assert check_call_mock.call_args == expected_call
 
-    @mock.patch('pip.main', autospec=True)
-    def test_download_requirements_file(self, pip_main_mock):
-        download_path = self._mkdtemp()
+    @mock.patch('subprocess.check_call', autospec=True)
+    def test_download_requirements_file(self, check_call_mock, tmp_path):
+        download_path = str(tmp_path)
         downloader = download.PackageDownloader(download_path)
 
         downloader.download(requirements_file='requirements.txt')
 
-        expected_call = mock.call(
-            ['download', '-d', download_path, '-r', 'requirements.txt'])
-        assert pip_main_mock.call_args == expected_call
+        expected_call = mock.call([
+            sys.executable, '-m', 'pip',
+            'download', '-d', download_path, '-r', 'requirements.txt',
+        ])
+        assert check_call_mock.call_args == expected_call
 
-    @mock.patch('pip.main', autospec=True)
-    def test_download_no_use_wheel(self, pip_main_mock):
-        download_path = self._mkdtemp()
+    @mock.patch('subprocess.check_call', autospec=True)
+    def test_download_no_use_wheel(self, check_call_mock, tmp_path):
+        download_path = str(tmp_path)
         downloader = download.PackageDownloader(download_path)
 
         downloader.download(
@@ -131,14 +127,19 @@ class TestPackageDownloader(object):
             no_use_wheel=True)
 
         expected_call = mock.call([
+            sys.executable, '-m', 'pip',
             'download',
             '-d', download_path,
             '--no-binary', ':all:',
             '-r', 'requirements.txt',
         ])
-        assert pip_main_mock.call_args == expected_call
+        assert check_call_mock.call_args == expected_call
+
+    @mock.patch('subprocess.check_call', autospec=True)
+    def test_download_pip_error(self, check_call_mock, tmp_path):
+        check_call_mock.side_effect = subprocess.CalledProcessError(1, 'pip')
+        download_path = str(tmp_path)
+        downloader = download.PackageDownloader(download_path)
 
-    def _mkdtemp(self):
-        tmpdir = tempfile.mkdtemp()
-        self._tmpdirs.append(tmpdir)
-        return tmpdir
+        with pytest.raises(subprocess.CalledProcessError):
+            downloader.download(requirements=['mock'])
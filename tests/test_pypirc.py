@@ -1,12 +1,11 @@
 """Tests for :mod:`pypiuploader.pypirc`."""
 
-try:
-    import configparser
-except ImportError:
-    import ConfigParser as configparser
-import io
-import tempfile
+import configparser
+import functools
+import os
+import re
 import types
+from unittest import mock
 
 import pytest
 
@@ -15,12 +14,10 @@ from pypiuploader import pypirc
 from . import utils
 
 
-def test_read_config():
+def test_read_config(pypirc_file):
     """Test :class:`pypiuploader.pypirc.read_config`."""
 
-    tmpfile = utils._make_tmp_pypirc_file()
-
-    config = pypirc.read_config(tmpfile.name)
+    config = pypirc.read_config(pypirc_file)
 
     assert isinstance(config, configparser.ConfigParser)
     sections = sorted(config.sections())
@@ -31,21 +28,45 @@ class TestRCParser(object):
 
     """Tests for :class:`pypiuploader.pypirc.RCParser`."""
 
-    def test_from_file(self):
-        tmpfile = utils._make_tmp_pypirc_file()
-
-        parser = pypirc.RCParser.from_file(tmpfile.name)
+    def test_from_file(self, pypirc_file):
+        parser = pypirc.RCParser.from_file(pypirc_file)
 
         assert isinstance(parser.config, configparser.ConfigParser)
         sections = sorted(parser.config.sections())
         assert sections == ['distutils', 'external', 'internal', 'pypi']
 
-    def test_from_file_when_pypirc_does_not_exist(self):
-        tmpfile = tempfile.NamedTemporaryFile()
-        tmpfile.close()
-        with pytest.raises(exceptions.ConfigFileError) as exc:
-            pypirc.RCParser.from_file(tmpfile.name)
-        assert tmpfile.name in str(exc.value)
+    def test_from_file_reads_file_once(self, pypirc_file):
+        read_config_patch = mock.patch.object(
+            pypirc,
+            'read_config',
+            autospec=True,
+            side_effect=pypirc.read_config)
+
+        with read_config_patch as read_config_mock:
+            parser1 = pypirc.RCParser.from_file(pypirc_file)
+            parser2 = pypirc.RCParser.from_file(pypirc_file)
+
+        assert read_config_mock.call_args_list == [mock.call(pypirc_file)]
+        assert parser1.config is parser2.config
+
+    def test_from_file_when_modified(self, tmp_path):
+        path = tmp_path / '.pypirc'
+        path.write_bytes(utils.PYPIRC)
+        parser1 = pypirc.RCParser.from_file(str(path))
+        path.write_bytes(b'[distutils]\n')
+        mtime = path.stat().st_mtime_ns + 1000000000
+        os.utime(str(path), ns=(mtime, mtime))
+
+        parser2 = pypirc.RCParser.from_file(str(path))
+
+        assert 'internal' in parser1.config.sections()
+        assert parser2.config.sections() == ['distutils']
+
+    def test_from_file_when_pypirc_does_not_exist(self, tmp_path):
+        path = str(tmp_path / 'nonexistent')
+        match = re.escape(path)
+        with pytest.raises(exceptions.ConfigFileError, match=match):
+            pypirc.RCParser.from_file(path)
 
     def test_read_index_servers(self):
         parser = self._make_parser()
@@ -136,8 +157,13 @@ class TestRCParser(object):
     def _make_parser(self, content=None):
         if content is None:
             content = utils.PYPIRC
-        config_buffer = io.StringIO(content.decode())
-        config = configparser.ConfigParser()
-        config.readfp(config_buffer)
-        parser = pypirc.RCParser(config)
+        parser = pypirc.RCParser(_parse_config(content))
         return parser
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_config(content):
+    # Shared by the tests, RCParser only reads the config.
+    config = configparser.ConfigParser()
+    config.read_string(content.decode())
+    return config
@@ -1,167 +1,357 @@
 """Tests for :mod:`pypiuploader.upload`."""
 
-import tempfile
+import io
+import os.path
+import re
+import types
+from unittest import mock
 
-try:
-    from unittest import mock
-except ImportError:
-    import mock
 import pytest
 import requests
 
 from pypiuploader import exceptions
+from pypiuploader import pypirc
 from pypiuploader import upload
 from . import utils
 
 
+#: Expected ``time.sleep()`` calls before two retries of an upload.
+_RETRY_SLEEP_CALLS = [
+    mock.call(upload.RETRY_BACKOFF),
+    mock.call(upload.RETRY_BACKOFF * 2),
+]
+
+
+#: Repository config of the ``from_repository_config()`` tests.
+_REPOSITORY_CONFIG = {
+    'repository': 'http://localhost:8000',
+    'username': 'foo',
+    'password': 'bar',
+}
+
+
+@pytest.fixture(scope='module')
+def real_uploader():
+    """Uploader to ``http://localhost:8000``, shared by the module's tests."""
+    return upload.PackageUploader('http://localhost:8000', 'user', 'pass')
+
+
+def _make_response(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    return response
+
+
+class _StubSession(object):
+
+    """Stand-in for :class:`requests.Session` returning given responses.
+
+    Records ``(url, body, headers, body content)`` of every post in
+    :attr:`posts`.
+
+    """
+
+    def __init__(self, responses):
+        self.responses = iter(responses)
+        self.posts = []
+
+    def post(self, url, data, headers):
+        self.posts.append((url, data, headers, data.to_string()))
+        return next(self.responses)
+
+
+@pytest.mark.parametrize('status_code', [200, 201, 302])
+def test_classify_status_ok(status_code):
+    """Test :func:`pypiuploader.upload._classify_status` for no errors."""
+
+    error = upload._classify_status(
+        status_code, 'Foo bar', 'http://localhost:8000', 'foo.tar.gz')
+
+    assert error is None
+
+
+@pytest.mark.parametrize('status_code, error_class, message', [
+    (401, requests.HTTPError,
+     '401 Client Error: Foo bar for url: http://localhost:8000'),
+    (500, requests.HTTPError,
+     '500 Server Error: Foo bar for url: http://localhost:8000'),
+    (409, exceptions.PackageConflictError,
+     'Package foo.tar.gz already uploaded.'),
+], ids=['client_error', 'server_error', 'conflict_error'])
+def test_classify_status_error(status_code, error_class, message):
+    """Test :func:`pypiuploader.upload._classify_status` for errors."""
+
+    error = upload._classify_status(
+        status_code, 'Foo bar', 'http://localhost:8000', 'foo.tar.gz')
+
+    assert type(error) is error_class
+    assert str(error) == message
+
+
 class TestPackageUploader(object):
 
     """Tests for :class:`pypiuploader.upload.PackageUploader`."""
 
-    def setup(self):
-        self.uploader = upload.PackageUploader(
-            'http://localhost:8000', 'user', 'pass')
+    @pytest.mark.parametrize('make_uploader, expected', [
+        (lambda config_path: upload.PackageUploader(
+            'http://localhost:8000', 'user', 'pass'),
+         ('http://localhost:8000', 'user', 'pass')),
+        (lambda config_path: upload.PackageUploader('http://localhost:8000'),
+         ('http://localhost:8000', None, None)),
+        (lambda config_path: upload.PackageUploader.from_repository_config(
+            _REPOSITORY_CONFIG),
+         ('http://localhost:8000', 'foo', 'bar')),
+        (lambda config_path: upload.PackageUploader.from_repository_config(
+            _REPOSITORY_CONFIG, username='bar', password='foo'),
+         ('http://localhost:8000', 'bar', 'foo')),
+        (lambda config_path: upload.PackageUploader.from_rc_file(
+            'internal', config_path=config_path),
+         ('http://127.0.0.1:8000', 'bar', 'foo')),
+        (lambda config_path: upload.PackageUploader.from_rc_file(
+            'internal',
+            username='foo',
+            password='bar',
+            config_path=config_path),
+         ('http://127.0.0.1:8000', 'foo', 'bar')),
+        (lambda config_path: upload.PackageUploader.from_rc_file(
+            'http://localhost:8000',
+            username='foo',
+            password='bar',
+            config_path=os.path.join(
+                os.path.dirname(config_path), 'nonexistent')),
+         ('http://localhost:8000', 'foo', 'bar')),
+    ], ids=[
+        'auth',
+        'no_username',
+        'from_repository_config',
+        'from_repository_config_custom_auth',
+        'from_rc_file',
+        'from_rc_file_custom_auth',
+        'from_rc_file_when_no_pypirc',
+    ])
+    def test_init(self, pypirc_file, make_uploader, expected):
+        uploader = make_uploader(pypirc_file)
 
-    def test_init(self):
-        assert self.uploader.host == 'http://localhost:8000'
-        assert self.uploader.username == 'user'
-        assert self.uploader.password == 'pass'
-        assert self.uploader._data == {':action': 'file_upload'}
-        assert isinstance(self.uploader._session, requests.Session)
-        assert self.uploader._session.auth == ('user', 'pass')
+        host, username, password = expected
+        assert uploader.host == host
+        assert uploader.username == username
+        assert uploader.password == password
+        assert uploader._data is upload._UPLOAD_DATA
+        assert type(uploader._session) is requests.Session
+        if username:
+            assert uploader._session.auth == (username, password)
+        else:
+            assert uploader._session.auth is None
 
-    def test_init_no_username(self):
+    def test_init_max_retries(self):
         uploader = upload.PackageUploader('http://localhost:8000')
-        assert uploader.host == 'http://localhost:8000'
-        assert uploader.username is None
-        assert uploader.password is None
-        assert uploader._data == {':action': 'file_upload'}
-        assert isinstance(uploader._session, requests.Session)
-        assert uploader._session.auth is None
+        for url in ('http://localhost:8000', 'https://localhost:8000'):
+            max_retries = uploader._session.get_adapter(url).max_retries
+            assert max_retries.total == upload.MAX_RETRIES
+            assert max_retries.read is False
+            assert max_retries.backoff_factor == upload.RETRY_BACKOFF
+            assert not max_retries.is_retry('POST', 503)
 
-    def test_init_from_repository_config(self):
-        config = {
-            'repository': 'http://localhost:8000',
-            'username': 'foo',
-            'password': 'bar',
-        }
-        uploader = upload.PackageUploader.from_repository_config(config)
-        assert uploader.host == 'http://localhost:8000'
-        assert uploader.username == 'foo'
-        assert uploader.password == 'bar'
-        assert uploader._data == {':action': 'file_upload'}
-        assert isinstance(uploader._session, requests.Session)
+    def test_init_pool_size(self):
+        uploader = upload.PackageUploader(
+            'http://localhost:8000', pool_size=16)
+        for url in ('http://localhost:8000', 'https://localhost:8000'):
+            adapter = uploader._session.get_adapter(url)
+            assert adapter._pool_maxsize == 16
+
+    def test_init_session(self):
+        session = requests.Session()
+        adapter = session.get_adapter('http://localhost:8000')
+
+        uploader = upload.PackageUploader(
+            'http://localhost:8000', 'foo', 'bar', session=session)
+
+        assert uploader._session is session
         assert uploader._session.auth == ('foo', 'bar')
+        assert session.get_adapter('http://localhost:8000') is adapter
 
-    def test_init_from_repository_config_custom_auth(self):
-        config = {
-            'repository': 'http://localhost:8000',
-            'username': 'foo',
-            'password': 'bar',
-        }
-        uploader = upload.PackageUploader.from_repository_config(
-            config, username='bar', password='foo')
-        assert uploader.host == 'http://localhost:8000'
-        assert uploader.username == 'bar'
-        assert uploader.password == 'foo'
-        assert uploader._data == {':action': 'file_upload'}
-        assert isinstance(uploader._session, requests.Session)
-        assert uploader._session.auth == ('bar', 'foo')
+    def test_init_session_no_username(self):
+        session = requests.Session()
 
-    def test_init_from_rc_file(self):
-        tmpfile = utils._make_tmp_pypirc_file()
-        uploader = upload.PackageUploader.from_rc_file(
-            'internal', config_path=tmpfile.name)
-        assert uploader.host == 'http://127.0.0.1:8000'
-        assert uploader.username == 'bar'
-        assert uploader.password == 'foo'
-        assert uploader._data == {':action': 'file_upload'}
-        assert isinstance(uploader._session, requests.Session)
-        assert uploader._session.auth == ('bar', 'foo')
+        uploader = upload.PackageUploader(
+            'http://localhost:8000', session=session)
+
+        assert uploader._session is session
+        assert uploader._session.auth is None
 
-    def test_init_from_rc_file_custom_auth(self):
-        tmpfile = utils._make_tmp_pypirc_file()
+    @mock.patch.object(pypirc.RCParser, 'from_file', autospec=True)
+    def test_init_from_rc_file_url_and_auth(self, from_file_mock):
         uploader = upload.PackageUploader.from_rc_file(
-            'internal',
+            'http://127.0.0.1:8000',
             username='foo',
             password='bar',
-            config_path=tmpfile.name)
+            pool_size=4)
+        assert not from_file_mock.called
         assert uploader.host == 'http://127.0.0.1:8000'
         assert uploader.username == 'foo'
         assert uploader.password == 'bar'
-        assert uploader._data == {':action': 'file_upload'}
-        assert isinstance(uploader._session, requests.Session)
         assert uploader._session.auth == ('foo', 'bar')
+        adapter = uploader._session.get_adapter('http://127.0.0.1:8000')
+        assert adapter._pool_maxsize == 4
 
-    def test_init_from_rc_file_when_no_pypirc(self):
-        tmpfile = tempfile.NamedTemporaryFile()
-        tmpfile.close()
+    def test_init_from_rc_file_url_without_password(self, pypirc_file):
         uploader = upload.PackageUploader.from_rc_file(
-            'http://localhost:8000',
+            'http://127.0.0.1:8000',
             username='foo',
-            password='bar',
-            config_path=tmpfile.name)
-        assert uploader.host == 'http://localhost:8000'
+            config_path=pypirc_file)
+        assert uploader.host == 'http://127.0.0.1:8000'
         assert uploader.username == 'foo'
-        assert uploader.password == 'bar'
-        assert uploader._data == {':action': 'file_upload'}
-        assert isinstance(uploader._session, requests.Session)
-        assert uploader._session.auth == ('foo', 'bar')
+        assert uploader.password == 'foo'
+
+    def test_make_request_files(self, real_uploader):
+        package = io.BytesIO(b'foo\nbar\n')
+        files = real_uploader._make_request_files(
+            '/foo/bar/baz.tar.gz', package)
+        assert files == {'content': ('baz.tar.gz', package)}
 
-    def test_read_file(self):
-        tmpfile = utils._make_tmp_pypirc_file(b'foo\nbar\n')
-        content = self.uploader._read_file(tmpfile.name)
-        assert content == b'foo\nbar\n'
+    def test_make_request_body(self, real_uploader):
+        package = io.BytesIO(b'foo\nbar\n')
 
-    @mock.patch.object(upload.PackageUploader, '_read_file')
-    def test_make_request_files(self, read_file_mock):
-        read_file_mock.return_value = b'foo\nbar\n'
-        files = self.uploader._make_request_files('/foo/bar/baz.tar.gz')
-        assert files == {'content': ('baz.tar.gz', b'foo\nbar\n')}
+        body = real_uploader._make_request_body(
+            [('/foo/bar/baz.tar.gz', package)])
 
-    def test_raise_for_status_ok(self):
-        response = requests.Response()
-        response.status_code = 200
+        assert body.fields == [
+            (':action', 'file_upload'),
+            ('content', ('baz.tar.gz', package)),
+        ]
+        assert body.content_type.startswith('multipart/form-data; boundary=')
+
+    def test_raise_for_status_ok(self, real_uploader):
+        response = types.SimpleNamespace(
+            status_code=200, reason='OK', url='http://localhost:8000')
 
         try:
-            self.uploader._raise_for_status(response, 'foo.tar.gz')
+            real_uploader._raise_for_status(response, 'foo.tar.gz')
         except (requests.HTTPError, exceptions.PackageConflictError) as exc:
             raise AssertionError('{0!r} should not be raised.'.format(exc))
 
-    def test_raise_for_status_401(self):
-        response = requests.Response()
-        response.status_code = 401
-        response.reason = 'Foo bar'
+    def test_raise_for_status_401(self, real_uploader):
+        response = types.SimpleNamespace(
+            status_code=401,
+            reason='Foo bar',
+            url='http://localhost:8000',
+            request=requests.PreparedRequest())
+
+        match = r'^401 Client Error: Foo bar'
+        with pytest.raises(requests.HTTPError, match=match) as exc:
+            real_uploader._raise_for_status(response, 'foo.tar.gz')
+
+        assert exc.value.response is response
+        assert exc.value.request is response.request
+
+    def test_raise_for_status_conflict_error(self, real_uploader):
+        response = types.SimpleNamespace(
+            status_code=409, reason='Foo bar', url='http://localhost:8000')
 
-        with pytest.raises(requests.HTTPError) as exc:
-            self.uploader._raise_for_status(response, 'foo.tar.gz')
+        match = r'^Package foo\.tar\.gz already uploaded\.$'
+        with pytest.raises(exceptions.PackageConflictError, match=match):
+            real_uploader._raise_for_status(response, 'foo.tar.gz')
 
-        assert str(exc.value).startswith('401 Client Error: Foo bar')
-        assert exc.value.response == response
+    def test_upload(self, real_uploader, monkeypatch):
+        response_mock = _make_response(200)
+        session = _StubSession([response_mock])
+        monkeypatch.setattr(real_uploader, '_session', session)
 
-    def test_raise_for_status_conflict_error(self):
-        response = requests.Response()
-        response.status_code = 409
-        response.reason = 'Foo bar'
+        with utils._make_tmp_pypirc_file(b'foo\nbar\n') as tmpfile:
+            response = real_uploader.upload(tmpfile.name)
 
-        with pytest.raises(exceptions.PackageConflictError) as exc:
-            self.uploader._raise_for_status(response, 'foo.tar.gz')
+        assert response is response_mock
+        assert len(session.posts) == 1
+        url, body, headers, posted = session.posts[0]
+        assert url == 'http://localhost:8000'
+        assert headers == {'Content-Type': body.content_type}
+        filename = os.path.basename(tmpfile.name)
+        (action_field, action), (content_field, content) = body.fields
+        assert (action_field, action) == (':action', 'file_upload')
+        assert content_field == 'content'
+        assert content[0] == filename
+        assert content[1].closed
+        assert b'name="content"; filename="' + filename.encode() in posted
+        assert b'\r\n\r\nfoo\nbar\n\r\n' in posted
+
+    def test_make_request_body_many(self, real_uploader):
+        package1 = io.BytesIO(b'foo\n')
+        package2 = io.BytesIO(b'bar\n')
 
-        assert str(exc.value) == 'Package foo.tar.gz already uploaded.'
+        body = real_uploader._make_request_body([
+            ('/foo/bar/baz-1.0.tar.gz', package1),
+            ('/foo/bar/qux-2.0.tar.gz', package2),
+        ])
 
-    @mock.patch.object(requests.Session, 'post')
-    @mock.patch.object(upload.PackageUploader, '_read_file')
-    def test_upload(self, read_file_mock, post_mock):
-        read_file_mock.return_value = 'foo\nbar\n'
-        response_mock = requests.Response()
-        response_mock.status_code = 200
-        post_mock.return_value = response_mock
+        assert body.fields == [
+            (':action', 'file_upload'),
+            ('content', ('baz-1.0.tar.gz', package1)),
+            ('content', ('qux-2.0.tar.gz', package2)),
+        ]
 
-        response = self.uploader.upload('/foo/bar.tar.gz')
+    def test_upload_many(self, real_uploader, monkeypatch):
+        response_mock = _make_response(200)
+        session = _StubSession([response_mock])
+        monkeypatch.setattr(real_uploader, '_session', session)
+
+        with utils._make_tmp_pypirc_file(b'foo\n') as tmpfile1:
+            with utils._make_tmp_pypirc_file(b'bar\n') as tmpfile2:
+                response = real_uploader.upload_many(
+                    [tmpfile1.name, tmpfile2.name])
 
         assert response is response_mock
-        expected_call = mock.call(
-            'http://localhost:8000',
-            data={':action': 'file_upload'},
-            files={'content': ('bar.tar.gz', 'foo\nbar\n')})
-        assert post_mock.call_args == expected_call
+        assert len(session.posts) == 1
+        __, body, __, posted = session.posts[0]
+        filenames = [content[0] for __, content in body.fields[1:]]
+        assert filenames == [
+            os.path.basename(tmpfile1.name),
+            os.path.basename(tmpfile2.name),
+        ]
+        assert all(content[1].closed for __, content in body.fields[1:])
+        assert b'\r\n\r\nfoo\n\r\n' in posted
+        assert b'\r\n\r\nbar\n\r\n' in posted
+
+    def test_upload_many_conflict(self, real_uploader, monkeypatch):
+        session = _StubSession([_make_response(409)])
+        monkeypatch.setattr(real_uploader, '_session', session)
+
+        with utils._make_tmp_pypirc_file(b'foo\n') as tmpfile1:
+            with utils._make_tmp_pypirc_file(b'bar\n') as tmpfile2:
+                message = 'Package {0}, {1} already uploaded.'.format(
+                    tmpfile1.name, tmpfile2.name)
+                match = '^{0}$'.format(re.escape(message))
+                with pytest.raises(
+                        exceptions.PackageConflictError, match=match):
+                    real_uploader.upload_many([tmpfile1.name, tmpfile2.name])
+
+    @mock.patch('time.sleep', autospec=True)
+    def test_post_retry(self, sleep_mock, real_uploader, monkeypatch):
+        package = io.BytesIO(b'foo\nbar\n')
+        session = _StubSession([
+            _make_response(503),
+            _make_response(502),
+            _make_response(200),
+        ])
+        monkeypatch.setattr(real_uploader, '_session', session)
+
+        response = real_uploader._post([('/foo/bar/baz.tar.gz', package)])
+
+        assert response.status_code == 200
+        assert len(session.posts) == 3
+        for __, __, __, posted in session.posts:
+            assert b'\r\n\r\nfoo\nbar\n\r\n' in posted
+        assert sleep_mock.call_args_list == _RETRY_SLEEP_CALLS
+
+    @mock.patch('time.sleep', autospec=True)
+    def test_upload_retry_exhausted(
+            self, sleep_mock, real_uploader, monkeypatch):
+        responses = [_make_response(500)] * (upload.MAX_RETRIES + 1)
+        session = _StubSession(responses)
+        monkeypatch.setattr(real_uploader, '_session', session)
+
+        with utils._make_tmp_pypirc_file(b'foo\nbar\n') as tmpfile:
+            with pytest.raises(requests.HTTPError):
+                real_uploader.upload(tmpfile.name)
+
+        assert len(session.posts) == upload.MAX_RETRIES + 1
+        assert len(sleep_mock.call_args_list) == upload.MAX_RETRIES
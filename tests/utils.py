@@ -24,10 +24,15 @@ username: baz
 """
 
 
-def _make_tmp_pypirc_file(content=None):
-    if content is None:
-        content = PYPIRC
-    tmpfile = tempfile.NamedTemporaryFile()
+def _make_tmp_pypirc_file(content):
+    """Return a named temporary file with the given content.
+
+    The file is removed when closed, use it as a context manager.
+    For a file with the :data:`PYPIRC` content use the ``pypirc_file``
+    fixture, it is written once per test session.
+
+    """
+    # Unbuffered, the content is on disk as soon as it's written.
+    tmpfile = tempfile.NamedTemporaryFile(buffering=0)
     tmpfile.write(content)
-    tmpfile.seek(0)
     return tmpfile